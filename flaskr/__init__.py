@@ -1,15 +1,22 @@
-from flask import Flask, jsonify, request
+from flask import Flask
 import os
 
-from flaskr.services.email_services import EmailServices
-from flaskr.models.email_model import Email
-
 def create_app(test_config=None):
     # create and configure the app
     app = Flask(__name__, instance_relative_config=True)
+
+    from .serialization import ORJSONProvider
+    app.json = ORJSONProvider(app)
+
     app.config.from_mapping(
         SECRET_KEY='dev',
         DATABASE=os.path.join(app.instance_path, 'flaskr.sqlite'),
+        USER_CACHE_MAXSIZE=10_000,
+        USER_CACHE_TTL=300,
+        DB_POOL_MIN_SIZE=1,
+        DB_POOL_MAX_SIZE=8,
+        DB_EXTRA_PRAGMAS=(),
+        PASSWORD_HASH_METHOD='scrypt',
     )
 
     if test_config is None:
@@ -28,6 +35,9 @@ def create_app(test_config=None):
     from . import db
     db.init_app(app)
 
+    from . import cache
+    cache.init_app(app)
+
     from . import routes
     routes.init_app(app)
 
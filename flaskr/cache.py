@@ -0,0 +1,122 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from flask import current_app
+
+
+class TTLCache:
+    """
+    A bounded in-process cache whose entries expire after a fixed time-to-live.
+    Once full, the least recently used entry is evicted first. The cache is
+    shared by the requests of an app, so every operation holds a lock.
+
+    Every pop or clear bumps a generation counter. A caller that reads the
+    generation before loading a value can pass it to set, which then skips
+    the write if an invalidation happened in between, so a value loaded
+    before an invalidation cannot be cached after it.
+
+    Attributes:
+        maxsize: The maximum number of entries kept in the cache.
+        ttl: The number of seconds an entry stays valid.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, timer: Callable[[], float] = time.monotonic) -> None:
+        """
+        Initialize an empty cache.
+
+        Args:
+            maxsize: The maximum number of entries kept in the cache.
+            ttl: The number of seconds an entry stays valid.
+            timer: The clock used to expire entries.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._timer = timer
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    @property
+    def generation(self) -> int:
+        """The number of invalidations (pops and clears) so far."""
+        return self._generation
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Look up a key, dropping it if it has expired.
+
+        Args:
+            key: The key to look up.
+            default: The value returned when the key is missing or expired.
+
+        Returns:
+            The cached value or the default.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at <= self._timer():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None) -> bool:
+        """
+        Store a value, evicting the least recently used entry if the cache is full.
+
+        Args:
+            key: The key to store the value under.
+            value: The value to cache.
+            generation: The generation read before the value was loaded. If
+                the cache has been invalidated since, the value is not stored.
+
+        Returns:
+            True if the value was stored.
+        """
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return False
+            self._entries[key] = (value, self._timer() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return True
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Remove a key from the cache.
+
+        Args:
+            key: The key to remove.
+            default: The value returned when the key is missing.
+
+        Returns:
+            The removed value or the default.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            self._generation += 1
+        return default if entry is None else entry[0]
+
+    def clear(self) -> None:
+        """Remove every entry from the cache."""
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+
+def get_user_cache() -> TTLCache:
+    """
+    Return the user existence cache of the current application.
+    """
+    return current_app.extensions['user_cache']
+
+
+def init_app(app):
+    app.extensions['user_cache'] = TTLCache(
+        app.config['USER_CACHE_MAXSIZE'], app.config['USER_CACHE_TTL'])
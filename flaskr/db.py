@@ -1,25 +1,149 @@
+import queue
 import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Sequence, Tuple
 
 import click
 from flask import current_app, g
 
+# Applied to every new connection. WAL with synchronous=NORMAL avoids an fsync
+# on every commit and lets readers proceed while a write is in progress. The
+# page cache is 64 MiB per connection (negative sizes are in KiB).
+PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA mmap_size=268435456',
+    'PRAGMA busy_timeout=5000',
+    'PRAGMA cache_size=-65536',
+)
+
+
+class ConnectionPool:
+    """
+    A pool of SQLite connections to one database, shared by every request of
+    an app, so requests reuse open connections (and their prepared statements)
+    instead of paying the connection setup on every request.
+
+    Connections are opened lazily: the first acquire() fills the pool up to
+    min_size, and at most max_size idle connections are kept around. Each new
+    connection runs the warm_up statements once, so their prepared statements
+    are already cached when the first request uses them.
+
+    Attributes:
+        database: The path or "file:" URI of the SQLite database.
+        min_size: The number of connections opened on first use.
+        max_size: The maximum number of idle connections kept in the pool.
+        warm_up: (sql, params) pairs of read-only statements to prepare.
+        pragmas: Extra PRAGMA statements run after the default PRAGMAS.
+    """
+
+    def __init__(self, database: str, min_size: int = 1, max_size: int = 8,
+                 warm_up: Sequence[Tuple[str, Tuple]] = (),
+                 pragmas: Sequence[str] = ()) -> None:
+        self.database = database
+        self.min_size = min_size
+        self.max_size = max_size
+        self.warm_up = warm_up
+        self.pragmas = pragmas
+        self._idle = queue.LifoQueue(maxsize=max_size)
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.database,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            cached_statements=256,
+            isolation_level=None,
+            check_same_thread=False,
+            uri=True
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in PRAGMAS + tuple(self.pragmas):
+            conn.execute(pragma)
+        try:
+            for sql, params in self.warm_up:
+                conn.execute(sql, params).fetchall()
+        except sqlite3.OperationalError:
+            # The schema has not been created yet (e.g. during init-db).
+            pass
+        return conn
+
+    def _initialize(self) -> None:
+        with self._lock:
+            if self._initialized:
+                return
+            for _ in range(self.min_size):
+                self._idle.put_nowait(self._connect())
+            self._initialized = True
+
+    def acquire(self) -> sqlite3.Connection:
+        """
+        Take an idle connection from the pool, opening a new one if none is idle.
+        """
+        if not self._initialized:
+            self._initialize()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """
+        Return a connection to the pool, closing it if the pool is full.
+        Any transaction left open by the request is rolled back first.
+        """
+        if conn.in_transaction:
+            conn.execute('ROLLBACK')
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close(self) -> None:
+        """Close every idle connection."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+def get_pool() -> ConnectionPool:
+    return current_app.extensions['db_pool']
+
 
 def get_db():
     if 'db' not in g:
-        g.db = sqlite3.connect(
-            current_app.config['DATABASE'],
-            detect_types=sqlite3.PARSE_DECLTYPES
-        )
-        g.db.row_factory = sqlite3.Row
+        g.db = get_pool().acquire()
 
     return g.db
 
 
+@contextmanager
+def transaction(db):
+    """
+    Run the enclosed statements in a single write transaction.
+
+    Connections are opened in autocommit mode, so a lone statement commits on
+    its own. Use this only when several statements must succeed or fail together.
+    """
+    db.execute('BEGIN IMMEDIATE')
+    try:
+        yield db
+    except BaseException:
+        db.execute('ROLLBACK')
+        raise
+    db.execute('COMMIT')
+
+
 def close_db(e=None):
     db = g.pop('db', None)
 
     if db is not None:
-        db.close()
+        get_pool().release(db)
 
 
 def init_db():
@@ -37,5 +161,14 @@ def init_db_command():
 
 
 def init_app(app):
+    from flaskr.repositories.email_repo import EmailRepository
+    from flaskr.repositories.user_repo import UserRepository
+
+    app.extensions['db_pool'] = ConnectionPool(
+        app.config['DATABASE'],
+        app.config['DB_POOL_MIN_SIZE'],
+        app.config['DB_POOL_MAX_SIZE'],
+        EmailRepository.WARM_UP + UserRepository.WARM_UP,
+        app.config['DB_EXTRA_PRAGMAS'])
     app.teardown_appcontext(close_db)
     app.cli.add_command(init_db_command)
@@ -0,0 +1,2 @@
+class ConflictError(Exception):
+    """Raised when a request conflicts with the current state of a resource."""
@@ -1,28 +1,43 @@
+_MAX_SUBJECT = 255
+_MAX_BODY = 5000
+
+
 class Email:
+    __slots__ = ('message_subject', 'body', 'sender_username', 'recipient_username')
+
     def __init__(self, message_subject=None, body=None, sender_username=None, recipient_username=None):
         self.message_subject = message_subject
         self.body = body
         self.sender_username = sender_username
         self.recipient_username = recipient_username
 
-    def is_valid(self):
+    def as_tuple(self):
+        """
+        Return the fields in the column order of the email insert statements.
         """
-        Perform validations for the email.
+        return (self.message_subject, self.body, self.sender_username, self.recipient_username)
+
+    def validate(self):
+        """
+        Perform validations for the email. Construction does not validate, so
+        this must be called on untrusted input before any database work is done.
 
         Returns:
             bool: True if the email is valid, otherwise raises ValueError.
 
         Raises:
-            ValueError: If the subject or body is invalid.
+            ValueError: If a field is empty, not a string or too long.
         """
-        if not self.message_subject or not self.body:
-            raise ValueError("Subject and body cannot be empty.")
-        if len(self.message_subject) > 255:
-            raise ValueError("Subject cannot exceed 255 characters.")
-        if len(self.body) > 5000:
-            raise ValueError("Body cannot exceed 5000 characters.")
+        for value, name, max_len in (
+            (self.message_subject, "Subject", _MAX_SUBJECT),
+            (self.body, "Body", _MAX_BODY),
+            (self.sender_username, "Sender", None),
+            (self.recipient_username, "Recipient", None),
+        ):
+            if not value:
+                raise ValueError(f"{name} cannot be empty.")
+            if not isinstance(value, str):
+                raise ValueError(f"{name} must be a string.")
+            if max_len is not None and len(value) > max_len:
+                raise ValueError(f"{name} cannot exceed {max_len} characters.")
         return True
-
-    def format_email_from_json(self, response):
-        data = response.json
-        self.message_subject = data["message_subject"]
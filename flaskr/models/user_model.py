@@ -1,17 +1,32 @@
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
 class User:
     def __init__(self, username, password):
         self.username = username
         self.password = password
+        self.password_hash = None
+
+    def hash_password(self, hash_method="scrypt"):
+        # Hashing is slow on purpose, so it is only done once the user is
+        # known to be valid; the plaintext is not kept afterwards.
+        self.password_hash = generate_password_hash(self.password, hash_method)
+        self.password = None
 
     def is_valid(self):
-        if not self.username:
-            raise ValueError("A user must have a username.")
-        elif not self.password:
-            raise ValueError("A user must have a password.")
-        elif len(self.username) < 2:
-            raise ValueError("Username must be at least 2 characters long.")
-        elif len(self.password) < 2:
-            raise ValueError(
-                "The password must be at least 2 characters long.")
-        else:
-            return True
+        for value, name, min_len, missing_error, short_error in (
+            (self.username, "Username", 2, "A user must have a username.",
+             "Username must be at least 2 characters long."),
+            (self.password, "Password", 2, "A user must have a password.",
+             "The password must be at least 2 characters long."),
+        ):
+            if not value:
+                raise ValueError(missing_error)
+            if not isinstance(value, str):
+                raise ValueError(f"{name} must be a string.")
+            if len(value) < min_len:
+                raise ValueError(short_error)
+        return True
+
+    def check_password(self, password):
+        return check_password_hash(self.password_hash, password)
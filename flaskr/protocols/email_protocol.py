@@ -2,8 +2,8 @@ from typing import Protocol
 
 
 class EmailModelProtocol(Protocol):
-    def __init__(self, subject: str, body: str, sender_username: str, recipient_username: str):
+    def __init__(self, message_subject: str, body: str, sender_username: str, recipient_username: str):
         ...
 
-    def is_valid(self) -> bool:
+    def validate(self) -> bool:
         ...
\ No newline at end of file
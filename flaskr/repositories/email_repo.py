@@ -1,39 +1,155 @@
-from typing import List
+import warnings
+from itertools import chain
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from flaskr.db import transaction
 from flaskr.models.email_model import Email
 
 
 class EmailRepository:
+    # List queries select a summary of each email without the body, which is
+    # only returned by get_email.
+    #
+    # The SQL is kept in constants so every call passes the identical string to
+    # sqlite3, which then reuses its prepared statement instead of re-parsing.
+    _Q_INSERT = 'INSERT INTO email (message_subject, body, sender_username, recipient_username) VALUES (?, ?, ?, ?)'
+    # Inserts only if both users exist, so the existence check and the insert
+    # are a single statement.
+    _Q_INSERT_IF_USERS_EXIST = """
+        INSERT INTO email (message_subject, body, sender_username, recipient_username)
+        SELECT ?, ?, s.username, r.username
+        FROM user s, user r
+        WHERE s.username = ? AND r.username = ?
+        RETURNING id, created_at
+    """
+    _Q_EXISTS = "SELECT 1 FROM email WHERE id = ?"
+    _Q_DELETE = 'DELETE FROM email WHERE id = ? RETURNING id'
+    _Q_GET = """
+        SELECT id, message_subject, body, sender_username, recipient_username, created_at
+        FROM email
+        WHERE id = ?
+    """
+    _Q_GET_ALL_TO_USER = """
+        SELECT id, message_subject, sender_username, recipient_username, created_at
+        FROM email
+        WHERE recipient_username = ?
+        ORDER BY created_at DESC, id DESC
+    """
+    _Q_GET_INDEXED = '''
+        SELECT COUNT(*) OVER w AS total,
+               e.id, e.message_subject, e.sender_username, e.recipient_username, e.created_at
+        FROM email e
+        WHERE recipient_username = ?
+        WINDOW w AS (ORDER BY e.created_at DESC, e.id DESC
+                     ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING)
+        ORDER BY e.created_at DESC, e.id DESC
+        LIMIT ? OFFSET ?
+    '''
+    _Q_COUNT_TO_USER = "SELECT COUNT(*) FROM email WHERE recipient_username = ?"
+    _Q_GET_FIRST_PAGE = '''
+        SELECT id, message_subject, sender_username, recipient_username, created_at
+        FROM email
+        WHERE recipient_username = ?
+        ORDER BY created_at DESC, id DESC
+        LIMIT ?
+    '''
+    _Q_GET_PAGE_AFTER = '''
+        SELECT id, message_subject, sender_username, recipient_username, created_at
+        FROM email
+        WHERE recipient_username = ? AND (created_at, id) < (?, ?)
+        ORDER BY created_at DESC, id DESC
+        LIMIT ?
+    '''
+
+    # Read-only statements, with parameters that match no rows, run once on every
+    # new pooled connection to fill its statement cache (see flaskr.db.ConnectionPool).
+    WARM_UP = (
+        (_Q_GET, (0,)),
+        (_Q_GET_ALL_TO_USER, ('',)),
+        (_Q_GET_INDEXED, ('', 0, 0)),
+        (_Q_COUNT_TO_USER, ('',)),
+        (_Q_GET_FIRST_PAGE, ('', 0)),
+        (_Q_GET_PAGE_AFTER, ('', '', 0, 0)),
+    )
+
     def __init__(self, db) -> None:
         self.db = db
 
+    def _execute_as_dicts(self, query: str, params: Tuple) -> Iterator[Dict[str, Any]]:
+        """
+        Run a query and lazily yield its rows as dictionaries.
+
+        The column names are read once from the cursor description and zipped
+        with plain tuple rows, which is cheaper than building sqlite3.Row
+        objects and converting each of them.
+        """
+        cursor = self.db.cursor()
+        cursor.row_factory = None
+        cursor.execute(query, params)
+        columns = [column[0] for column in cursor.description]
+        return (dict(zip(columns, row)) for row in cursor)
+
     def send_email(self, email: Email):
-        self.db.execute(
-            'INSERT INTO email (message_subject, body, sender_username, recipient_username) VALUES (?, ?, ?, ?)',
-            (email.message_subject, email.body,
-             email.sender_username, email.recipient_username)
-        )
-        self.db.commit()
+        """
+        Insert a single email, provided its sender and recipient exist.
+
+        Args:
+            email: The email to insert.
+
+        Returns:
+            The row holding the new email's id and created_at, or None if the
+            sender or recipient does not exist.
+        """
+        return self.db.execute(self._Q_INSERT_IF_USERS_EXIST, email.as_tuple()).fetchone()
+
+    def send_emails(self, emails: List[Email]):
+        """
+        Insert a batch of emails in a single statement and transaction.
+
+        Args:
+            emails: The emails to insert.
+
+        Returns:
+            A dictionary with a success message.
+        """
+        with transaction(self.db):
+            self.db.executemany(self._Q_INSERT, [email.as_tuple() for email in emails])
         return {"message": "Email sent successfully."}
 
     def email_exists(self, email_id: int) -> bool:
         """
         Check if an email exists in the database.
 
+        Deprecated: checking before acting costs an extra round-trip. Use the
+        result of the operation itself instead, e.g. delete_email or get_email
+        returning None.
+
         Returns:
             A boolean indicating if the email exists.
         """
-        query = "SELECT 1 FROM email WHERE id = ?"
-        result = self.db.execute(query, (email_id,)).fetchone()
+        warnings.warn(
+            "EmailRepository.email_exists is deprecated; use the result of "
+            "delete_email or get_email instead.",
+            DeprecationWarning, stacklevel=2)
+        result = self.db.execute(self._Q_EXISTS, (email_id,)).fetchone()
         return result is not None
 
-    def delete_email(self, id: int) -> tuple[dict[str, str], int]:
-        response = self.db.execute('DELETE FROM email WHERE id = ?', (id,))
-        self.db.commit()
-        return response
+    def delete_email(self, id: int):
+        """
+        Delete a single email by its ID.
+
+        Returns:
+            The deleted email's id row, or None if no email has the given ID.
+        """
+        return self.db.execute(self._Q_DELETE, (id,)).fetchone()
 
-    def get_email(self, email_id: int) -> tuple[dict[str, str], int]:
-        query = "SELECT 1 FROM email WHERE id = ?"
-        return self.db.execute(query, (email_id,)).fetchone()
+    def get_email(self, email_id: int):
+        """
+        Fetch a single email by its ID.
+
+        Returns:
+            The email row, or None if no email has the given ID.
+        """
+        return self.db.execute(self._Q_GET, (email_id,)).fetchone()
 
     def get_all_emails_to_user(self, recipient_username: str):
         """
@@ -43,18 +159,19 @@ class EmailRepository:
             recipient_username: The username of the recipient.
 
         Returns:
-            A list of emails for the specified user.
-        """
-        query = """
-            SELECT * FROM email
-            WHERE recipient_username = ?
-            ORDER BY created_at DESC
+            A lazy iterator over the emails for the specified user, as dictionaries.
         """
-        return self.db.execute(query, (recipient_username,)).fetchall()
+        return self._execute_as_dicts(self._Q_GET_ALL_TO_USER, (recipient_username,))
 
-    def get_indexed_emails_to_user(self, limit: int, offset: int, recipient_username: str):
+    def get_indexed_emails_to_user(self, limit: int, offset: int, recipient_username: str) -> Tuple[int, Iterator[Dict[str, Any]]]:
         """
-        Fetch a paginated list of emails sent to a specific user.
+        Fetch a paginated list of emails sent to a specific user, together with
+        the total number of emails sent to that user.
+
+        The total is computed by a window function in the same scan as the page.
+        The window is ordered like the page, so the index order is used for both
+        and the rows are not sorted again.
+        A separate COUNT query only runs when the page is empty.
 
         Args:
             limit: The maximum number of emails to return.
@@ -62,13 +179,38 @@ class EmailRepository:
             recipient_username: The username of the recipient.
 
         Returns:
-            A list of emails for the specified user within the given range.
-        """
-        query = '''
-            SELECT *
-            FROM email e
-            WHERE recipient_username = ?
-            ORDER BY e.created_at DESC
-            LIMIT ? OFFSET ?
-        '''
-        return self.db.execute(query, (recipient_username, limit, offset)).fetchall()
+            A tuple containing the total and a lazy iterator over the emails
+            within the given range, as dictionaries.
+        """
+        cursor = self.db.cursor()
+        cursor.row_factory = None
+        cursor.execute(self._Q_GET_INDEXED, (recipient_username, limit, offset))
+        first = cursor.fetchone()
+        if first is None:
+            total = self.db.execute(self._Q_COUNT_TO_USER, (recipient_username,)).fetchone()[0]
+            return total, iter(())
+
+        columns = [column[0] for column in cursor.description[1:]]
+        emails = (dict(zip(columns, row[1:])) for row in chain((first,), cursor))
+        return first[0], emails
+
+    def get_emails_to_user_after(self, limit: int, recipient_username: str, after: Optional[Tuple[str, int]] = None):
+        """
+        Fetch a page of emails sent to a specific user using keyset pagination.
+
+        Rather than skipping rows with OFFSET, the query seeks directly past the
+        last email of the previous page, so the cost of a page does not grow
+        with its depth.
+
+        Args:
+            limit: The maximum number of emails to return.
+            recipient_username: The username of the recipient.
+            after: The (created_at, id) of the last email on the previous page,
+                or None for the first page.
+
+        Returns:
+            A list of emails for the specified user as dictionaries, newest first.
+        """
+        if after is None:
+            return list(self._execute_as_dicts(self._Q_GET_FIRST_PAGE, (recipient_username, limit)))
+        return list(self._execute_as_dicts(self._Q_GET_PAGE_AFTER, (recipient_username, *after, limit)))
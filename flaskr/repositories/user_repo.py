@@ -1,23 +1,92 @@
+from typing import Iterable, Optional, Set
+
+import orjson
+from flaskr.cache import TTLCache
 from flaskr.models.user_model import User
 
 
 class UserRepository:
-    def __init__(self, db) -> None:
+    _Q_EXISTS = "SELECT 1 FROM user WHERE username = ?"
+    # The usernames are bound as one JSON array, so the statement text is the
+    # same for any number of names and stays in the statement cache.
+    _Q_EXISTING = "SELECT username FROM user WHERE username IN (SELECT value FROM json_each(?))"
+    _Q_INSERT = '''
+        INSERT INTO user (username, password_hash) VALUES (?, ?)
+        ON CONFLICT (username) DO NOTHING
+        RETURNING id
+    '''
+
+    # See EmailRepository.WARM_UP.
+    WARM_UP = (
+        (_Q_EXISTS, ('',)),
+        (_Q_EXISTING, ('[]',)),
+    )
+
+    def __init__(self, db, cache: Optional[TTLCache] = None) -> None:
         self.db = db
+        self.cache = cache
 
     def user_exists(self, username):
         """
         Check if a user exists in the database.
 
+        Both outcomes are cached, so repeated lookups of a missing user do not
+        reach the database either. register_user drops the cached entry, and
+        a miss read before a concurrent registration is not cached (see
+        TTLCache.set), so a new user is seen straight away.
+
         Returns:
             A boolean indicating if the user exists.
         """
-        query = "SELECT 1 FROM user WHERE username = ?"
-        result = self.db.execute(query, (username,)).fetchone()
-        return result is not None
+        generation = None
+        if self.cache is not None:
+            cached = self.cache.get(username)
+            if cached is not None:
+                return cached
+            generation = self.cache.generation
+        exists = self.db.execute(self._Q_EXISTS, (username,)).fetchone() is not None
+        if self.cache is not None:
+            self.cache.set(username, exists, None if exists else generation)
+        return exists
+
+    def users_exist(self, usernames: Iterable[str]) -> Set[str]:
+        """
+        Check which of the given users exist, in a single query.
+
+        Returns:
+            The set of usernames that exist in the database.
+        """
+        found = set()
+        missing = []
+        for username in set(usernames):
+            cached = self.cache.get(username) if self.cache is not None else None
+            if cached is None:
+                missing.append(username)
+            elif cached:
+                found.add(username)
+        if not missing:
+            return found
+
+        generation = self.cache.generation if self.cache is not None else None
+        for row in self.db.execute(self._Q_EXISTING, (orjson.dumps(missing).decode(),)):
+            found.add(row["username"])
+        if self.cache is not None:
+            for username in missing:
+                exists = username in found
+                self.cache.set(username, exists, None if exists else generation)
+        return found
 
     def register_user(self, user: User):
-        response = self.db.execute('INSERT INTO user (username, password) VALUES (?, ?)',
-                                   (user.username, user.password))
-        self.db.commit()
-        return response
+        """
+        Insert a new user.
+
+        Any cached lookup of the username is dropped, so it is looked up again.
+
+        Returns:
+            The row holding the new user's id, or None if the username is taken.
+        """
+        row = self.db.execute(
+            self._Q_INSERT, (user.username, user.password_hash)).fetchone()
+        if self.cache is not None:
+            self.cache.pop(user.username)
+        return row
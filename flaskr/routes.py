@@ -1,26 +1,45 @@
-from flask import jsonify, request
+from flask import current_app, g, jsonify, request
+from flaskr.cache import get_user_cache
 from flaskr.db import get_db
+from flaskr.serialization import stream_json
 from flaskr.services.email_services import EmailServices
 from flaskr.services.user_services import UserServices
 
 
+def get_email_service() -> EmailServices:
+    """
+    Return the email service of the current request, creating it on first use.
+    """
+    if 'email_service' not in g:
+        g.email_service = EmailServices(get_db(), get_user_cache())
+
+    return g.email_service
+
+
+def get_user_service() -> UserServices:
+    """
+    Return the user service of the current request, creating it on first use.
+    """
+    if 'user_service' not in g:
+        g.user_service = UserServices(
+            get_db(), get_user_cache(), current_app.config['PASSWORD_HASH_METHOD'])
+
+    return g.user_service
+
+
 def init_app(app):
     """
     Initialize the Flask application with the necessary routes.
 
+    Services are created lazily, so a request only builds the service (and
+    repositories) its route uses, and only routes that touch the database
+    take a pooled connection. The connection is released by
+    flaskr.db.close_db on teardown.
+
     Args:
         app: The Flask application instance.
     """
 
-    # @app.before_request
-    # def setup_services():
-    #     """
-    #     Create and store service objects in Flask's `g` object before each request.
-    #     """
-    #     g.db = get_db()
-    #     g.email_service = EmailServices(g.db)
-    #     g.user_service = UserServices(g.db)
-
     @app.route('/')
     def hello():
         """
@@ -39,10 +58,10 @@ def init_app(app):
         Returns:
             The response from the get_emails operation.
         """
-        db = get_db()
-        email_service = EmailServices(db)
-        message, status_code = email_service.handle_get_emails(request)
-        return jsonify(message), status_code
+        message, status_code = get_email_service().handle_get_emails(request.args)
+        if status_code != 200:
+            return jsonify(message), status_code
+        return stream_json(message, status_code)
 
     @app.route('/emails/<int:email_id>', methods=['GET'])
     def get_email(email_id):
@@ -52,9 +71,7 @@ def init_app(app):
         Returns:
             The response from the get_emails operation.
         """
-        db = get_db()
-        email_service = EmailServices(db)
-        message, status_code = email_service.handle_get_email(email_id)
+        message, status_code = get_email_service().handle_get_email(email_id)
         return jsonify(message), status_code
 
     @app.route('/emails', methods=['POST'])
@@ -65,9 +82,20 @@ def init_app(app):
         Returns:
             The response from the send_email operation.
         """
-        db = get_db()
-        email_service = EmailServices(db)
-        message, status_code = email_service.handle_send_email(request.json)
+        message, status_code = get_email_service().handle_send_email(
+            request.get_json(silent=True) or {})
+        return jsonify(message), status_code
+
+    @app.route('/emails/bulk', methods=['POST'])
+    def send_emails():
+        """
+        Handle sending a batch of emails provided as a JSON list.
+
+        Returns:
+            The response from the send_emails operation.
+        """
+        message, status_code = get_email_service().handle_send_emails(
+            request.get_json(silent=True) or [])
         return jsonify(message), status_code
 
     @app.route('/emails/<int:email_id>', methods=['DELETE'])
@@ -78,9 +106,7 @@ def init_app(app):
         Returns:
             The response from the delete_email operation.
         """
-        db = get_db()
-        email_service = EmailServices(db)
-        message, status_code = email_service.handle_delete_email(email_id)
+        message, status_code = get_email_service().handle_delete_email(email_id)
         return jsonify(message), status_code
 
     @app.route('/register', methods=['POST'])
@@ -94,7 +120,6 @@ def init_app(app):
         Returns:
             A success message with status code 201 if the user is registered successfully.
         """
-        db = get_db()
-        user_service = UserServices(db)
-        message, status_code = user_service.handle_register_user(request.json)
+        message, status_code = get_user_service().handle_register_user(
+            request.get_json(silent=True) or {})
         return jsonify(message), status_code
@@ -4,7 +4,7 @@ DROP TABLE IF EXISTS email;
 CREATE TABLE user (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
   username TEXT UNIQUE NOT NULL,
-  password TEXT NOT NULL
+  password_hash TEXT NOT NULL
 );
 
 CREATE TABLE email (
@@ -16,4 +16,12 @@ CREATE TABLE email (
   body TEXT NOT NULL,
   FOREIGN KEY (sender_username) REFERENCES user (username)
   FOREIGN KEY (recipient_username) REFERENCES user (username)
-);
\ No newline at end of file
+);
+
+-- Covers the summary columns of the recipient list queries, so a page is read
+-- from the index alone without looking up each row in the table.
+CREATE INDEX IF NOT EXISTS idx_email_recipient_covering
+  ON email (recipient_username, created_at DESC, id DESC, message_subject, sender_username);
+
+CREATE INDEX IF NOT EXISTS idx_email_sender_created
+  ON email (sender_username, created_at DESC);
@@ -0,0 +1,96 @@
+import sqlite3
+from collections.abc import Iterator
+from typing import Any, Dict
+
+import orjson
+from flask import Response, stream_with_context
+from flask.json.provider import JSONProvider
+
+CHUNK_SIZE = 64 * 1024
+
+# Naive datetimes come from SQLite's CURRENT_TIMESTAMP, which is in UTC.
+OPTIONS = orjson.OPT_NAIVE_UTC
+
+
+def iter_json(payload: Dict[str, Any]) -> Iterator[bytes]:
+    """
+    Serialize a JSON object piece by piece.
+
+    Lists are encoded with a single orjson call. Iterators (such as an open
+    sqlite3 cursor) are written one row at a time, so a large result set is
+    never held in memory as a whole.
+
+    Args:
+        payload: The object to serialize. Rows may be sqlite3.Row objects.
+
+    Yields:
+        Chunks of the encoded JSON document.
+    """
+    yield b'{'
+    for i, (key, value) in enumerate(payload.items()):
+        if i:
+            yield b','
+        yield orjson.dumps(key) + b':'
+        if isinstance(value, Iterator):
+            yield from _iter_json_array(value)
+        else:
+            yield orjson.dumps(value, default=_encode_row, option=OPTIONS)
+    yield b'}'
+
+
+def _encode_row(obj: Any) -> Dict[str, Any]:
+    """orjson hook for types it does not serialize natively."""
+    if isinstance(obj, sqlite3.Row):
+        return dict(obj)
+    raise TypeError
+
+
+def _iter_json_array(rows: Iterator[Any]) -> Iterator[bytes]:
+    # Rows are buffered into chunks of about CHUNK_SIZE bytes, so a large
+    # result set is still streamed without one socket write per row.
+    buffer = bytearray(b'[')
+    for i, row in enumerate(rows):
+        if i:
+            buffer += b','
+        buffer += orjson.dumps(row, default=_encode_row, option=OPTIONS)
+        if len(buffer) >= CHUNK_SIZE:
+            yield bytes(buffer)
+            buffer.clear()
+    buffer += b']'
+    yield bytes(buffer)
+
+
+def stream_json(payload: Dict[str, Any], status: int) -> Response:
+    """
+    Build a streamed JSON response for the payload.
+
+    Args:
+        payload: The object to serialize.
+        status: The HTTP status code of the response.
+
+    Returns:
+        A response that encodes the payload while it is being sent.
+    """
+    return Response(stream_with_context(iter_json(payload)),
+                    status=status, mimetype='application/json')
+
+
+class ORJSONProvider(JSONProvider):
+    """
+    A JSON provider backed by orjson, used by jsonify and request.get_json.
+
+    orjson encodes in C and produces bytes, so responses skip the pure-Python
+    encoder and the str-to-bytes round-trip of the default provider.
+    """
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, default=_encode_row, option=OPTIONS).decode('utf-8')
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=_encode_row, option=OPTIONS),
+            mimetype='application/json')
@@ -1,9 +1,19 @@
-from typing import List, Tuple, Dict, Any
-from flask import Request
+import base64
+import binascii
+from functools import cached_property
+from itertools import chain
+from typing import List, Optional, Set, Tuple, Dict, Any
+from werkzeug.datastructures import MultiDict
+from flaskr.cache import TTLCache
 from flaskr.models.email_model import Email
 from flaskr.repositories.email_repo import EmailRepository
 from flaskr.repositories.user_repo import UserRepository
 
+_MAX_BATCH = 100
+_MAX_PAGE_SIZE = 100
+# The largest integer SQLite can bind; larger values raise OverflowError.
+_MAX_SQLITE_INT = 2 ** 63 - 1
+
 
 class EmailServices:
     """
@@ -12,30 +22,48 @@ class EmailServices:
 
     Attributes:
         db: The database connection object.
-        email_repo: Repository for email operations.
-        user_repo: Repository for user operations.
+        user_cache: Cache for user existence lookups, if any.
+        email_repo: Repository for email operations, created on first use.
+        user_repo: Repository for user operations, created on first use.
     """
 
-    def __init__(self, db: Any) -> None:
+    def __init__(self, db: Any, user_cache: Optional[TTLCache] = None) -> None:
         """
         Initialize the EmailService with a database connection.
 
         Args:
             db: The database connection object.
+            user_cache: Optional cache for user existence lookups.
         """
         self.db = db
-        self.email_repo = EmailRepository(db)
-        self.user_repo = UserRepository(db)
+        self.user_cache = user_cache
+
+    @cached_property
+    def email_repo(self) -> EmailRepository:
+        return EmailRepository(self.db)
 
-    def handle_get_emails(self, request: Request) -> Tuple[Dict[str, Any], int]:
+    @cached_property
+    def user_repo(self) -> UserRepository:
+        return UserRepository(self.db, self.user_cache)
+
+    def handle_get_emails(self, args: MultiDict) -> Tuple[Dict[str, Any], int]:
         """
         Retrieve emails based on the request parameters. Handles pagination and error cases.
 
+        When a 'limit' is given the emails are paginated with an opaque 'cursor',
+        and the response includes the 'next_cursor' to pass in for the following
+        page (None once the last page is reached).
+
+        The recipient is only looked up when no emails are found: a user who has
+        received emails exists, so the common case needs a single query.
+
         Args:
-            request: The Flask Request object containing the parameters for fetching emails.
+            args: The query string parameters for fetching emails.
 
         Returns:
-            A tuple containing a dictionary with a list of emails and the HTTP status code.
+            A tuple containing a dictionary with the emails and the HTTP status code.
+            The emails may be a lazy iterator over the open cursor, and are
+            meant to be serialized with flaskr.serialization.stream_json.
 
         Raises:
             ValueError: If recipient_username is not provided or invalid.
@@ -43,12 +71,20 @@ class EmailServices:
             Exception: For other unexpected errors.
         """
         try:
-            start, stop, recipient_username = self.fetch_get_args(request)
-            self.is_valid_user(recipient_username)
+            start, stop, recipient_username = self.fetch_get_args(args)
+            after, limit = self.fetch_cursor_args(args)
 
-            emails = self.retrieve_emails(start, stop, recipient_username)
+            if limit is not None:
+                emails = self.email_repo.get_emails_to_user_after(
+                    limit, recipient_username, after)
+                if not emails:
+                    self.is_valid_user(recipient_username)
+                return {
+                    "emails": emails,
+                    "next_cursor": self._encode_cursor(emails, limit),
+                }, 200
 
-            return {"emails": [dict(email) for email in emails]}, 200
+            return self.retrieve_emails(start, stop, recipient_username), 200
 
         except ValueError as ve:
             return {"error": str(ve)}, 400
@@ -59,12 +95,12 @@ class EmailServices:
         except Exception as e:
             return {"error": "An error occurred while fetching emails."}, 500
 
-    def fetch_get_args(self, request: Request) -> Tuple[int, int, str]:
+    def fetch_get_args(self, args: MultiDict) -> Tuple[int, int, str]:
         """
-        Extract and validate request arguments for fetching emails from JSON payload.
+        Extract and validate request arguments for fetching emails from the query string.
 
         Args:
-            request: The Flask Request object containing parameters for fetching emails.
+            args: The query string parameters for fetching emails.
 
         Returns:
             A tuple containing start, stop, and recipient_username.
@@ -72,60 +108,120 @@ class EmailServices:
         Raises:
             ValueError: If the request parameters are invalid.
         """
-        start = request.args.get('start', default=None, type=int)
-        stop = request.args.get('stop', default=None, type=int)
-        recipient_username = request.args.get('recipient_username')
-
-        # Validate parameters
-        if start is not None and not isinstance(start, int):
-            raise ValueError("Invalid value for 'start'. Must be an integer.")
-        if stop is not None and not isinstance(stop, int):
-            raise ValueError("Invalid value for 'stop'. Must be an integer.")
-        if not recipient_username or type(recipient_username) != str:
+        recipient_username = args.get('recipient_username')
+        if not recipient_username:
             raise ValueError(
                 "Invalid value for 'recipient_username'. Must be a string.")
 
-        # Return parameters as tuple
+        # type=int already returns None for values that are not integers
+        start = args.get('start', type=int)
+        stop = args.get('stop', type=int)
+        if 'start' in args and (start is None or not 0 <= start <= _MAX_SQLITE_INT):
+            raise ValueError("Invalid value for 'start'. Must be a non-negative integer.")
+        if 'stop' in args and (stop is None or not 0 <= stop <= _MAX_SQLITE_INT):
+            raise ValueError("Invalid value for 'stop'. Must be a non-negative integer.")
+        if start is not None and stop is not None and stop <= start:
+            raise ValueError("Invalid start or stop index")
+
         return start, stop, recipient_username
 
-    def retrieve_emails(self, start: int = None, stop: int = None, recipient_username: str = None) -> List[Email]:
+    def fetch_cursor_args(self, args: MultiDict) -> Tuple[Optional[Tuple[str, int]], Optional[int]]:
         """
-        Retrieve emails based on pagination and username.
+        Extract and validate the keyset pagination arguments from the query string.
 
         Args:
-            start: The start index for pagination.
-            stop: The stop index for pagination.
-            recipient_username: The recipient's username.
+            args: The query string parameters for fetching emails.
+
+        Returns:
+            A tuple containing the decoded cursor (or None) and the page limit (or None).
+
+        Raises:
+            ValueError: If the cursor or limit are invalid.
+        """
+        cursor = args.get('cursor')
+        limit = args.get('limit', default=None, type=int)
+
+        if 'limit' in args and (limit is None or not 0 < limit <= _MAX_PAGE_SIZE):
+            raise ValueError(
+                f"Invalid value for 'limit'. Must be an integer between 1 and {_MAX_PAGE_SIZE}.")
+        if cursor is not None and limit is None:
+            raise ValueError("A 'limit' is required when paginating with a 'cursor'.")
+
+        after = self._decode_cursor(cursor) if cursor is not None else None
+        return after, limit
+
+    def _encode_cursor(self, emails: List[Dict[str, Any]], limit: int) -> Optional[str]:
+        """
+        Build the cursor pointing past the last email of a page.
+
+        Args:
+            emails: The emails on the current page.
+            limit: The page limit the emails were fetched with.
 
         Returns:
-            A list of emails.
+            The encoded cursor, or None if there are no more pages.
         """
-        if start is not None and stop is not None:
-            limit, offset = self.get_limit_and_offset(start, stop)
-            return self.email_repo.get_indexed_emails_to_user(limit, offset, recipient_username)
-        else:
-            return self.email_repo.get_all_emails_to_user(recipient_username)
+        if len(emails) < limit:
+            return None
+        last = emails[-1]
+        raw = f"{last['created_at']}|{last['id']}".encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii')
 
-    def get_limit_and_offset(self, start_index: int = 0, stop_index: int = 0) -> Tuple[int, int]:
+    def _decode_cursor(self, cursor: str) -> Tuple[str, int]:
         """
-        Calculate the limit and offset for pagination based on start and stop indices.
+        Decode a cursor produced by _encode_cursor.
 
         Args:
-            start_index: The starting index for pagination.
-            stop_index: The stopping index for pagination.
+            cursor: The encoded cursor.
 
         Returns:
-            A tuple containing the limit and offset for pagination.
+            A tuple containing the created_at and id of the last email seen.
 
         Raises:
-            ValueError: If the start_index or stop_index are invalid.
+            ValueError: If the cursor is malformed.
         """
-        if isinstance(start_index, int) and isinstance(stop_index, int):
-            if stop_index > start_index:
-                return stop_index - start_index, start_index
-        raise ValueError("Invalid start or stop index")
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+            created_at, email_id = raw.rsplit('|', 1)
+            email_id = int(email_id)
+            if not 0 <= email_id <= _MAX_SQLITE_INT:
+                raise ValueError(email_id)
+            return created_at, email_id
+        except (binascii.Error, UnicodeError, ValueError):
+            raise ValueError("Invalid value for 'cursor'.")
 
-    def handle_get_email(self, email_id: int) -> Dict[str, Any]:
+    def retrieve_emails(self, start: int = None, stop: int = None, recipient_username: str = None) -> Dict[str, Any]:
+        """
+        Retrieve emails based on pagination and username.
+
+        Args:
+            start: The start index for pagination.
+            stop: The stop index for pagination.
+            recipient_username: The recipient's username.
+
+        Returns:
+            The response payload: the emails and, when a start and stop index
+            are given, the total number of emails sent to the user.
+
+        Raises:
+            LookupError: If the user has no emails and does not exist.
+        """
+        if start is not None and stop is not None:
+            # fetch_get_args guarantees stop > start.
+            total, emails = self.email_repo.get_indexed_emails_to_user(
+                stop - start, start, recipient_username)
+            if total == 0:
+                self.is_valid_user(recipient_username)
+            return {"emails": emails, "total": total}
+        else:
+            emails = self.email_repo.get_all_emails_to_user(recipient_username)
+            first = next(emails, None)
+            if first is None:
+                self.is_valid_user(recipient_username)
+                return {"emails": []}
+            return {"emails": chain((first,), emails)}
+
+    def handle_get_email(self, email_id: int) -> Tuple[Dict[str, Any], int]:
         """
         Retrieve a single email by its ID.
 
@@ -133,7 +229,8 @@ class EmailServices:
             email_id: The ID of the email to retrieve.
 
         Returns:
-            A dictionary containing the email data or an error message.
+            A tuple containing the email data or an error message, and the
+            HTTP status code.
 
         Raises:
             ValueError: If email_id is invalid.
@@ -141,7 +238,7 @@ class EmailServices:
         """
         try:
             self.check_email_id(email_id)
-            return {"email": self._get_email(email_id)}, 201
+            return {"email": dict(self._get_email(email_id))}, 200
         except ValueError as ve:
             return {"error": str(ve)}, 400
         except LookupError as le:
@@ -155,13 +252,11 @@ class EmailServices:
             email_id: The ID of the email to validate.
 
         Raises:
-            ValueError: If email_id is None or not an integer.
+            ValueError: If email_id is None or negative.
         """
         if email_id is None:
             raise ValueError("Email ID cannot be None.")
-        if type(email_id) != int:
-            raise ValueError("Email ID must be an integer.")
-        elif email_id < 0:
+        if email_id < 0:
             raise ValueError("Email ID must be larger than 0.")
 
     def _get_email(self, email_id: int) -> Email:
@@ -183,25 +278,6 @@ class EmailServices:
                 "The email with the provided ID could not be found.")
         return response
 
-    def _validate_send_args(self, message_subject: str, sender_username: str, recipient_username: str) -> None:
-        """
-        Validate email request arguments.
-
-        Args:
-            message_subject: The email subject.
-            sender_username: The email sender's username.
-            recipient_username: The email recipient's username.
-
-        Raises:
-            ValueError: If any of the arguments are invalid.
-        """
-        if not message_subject:
-            raise ValueError("Message subject cannot be empty.")
-        if not sender_username:
-            raise ValueError("The email must have a sender.")
-        if not recipient_username:
-            raise ValueError("The email must have a recipient.")
-
     def is_valid_user(self, username: str) -> None:
         """
         Check if the user exists in the database.
@@ -215,7 +291,7 @@ class EmailServices:
         if not self.user_repo.user_exists(username):
             raise LookupError("User not found in database.")
 
-    def handle_send_email(self, json_data: Dict[str, Any]) -> Tuple[Dict[str, str], int]:
+    def handle_send_email(self, json_data: Any) -> Tuple[Dict[str, Any], int]:
         """
         Send an email based on the JSON payload.
 
@@ -223,17 +299,71 @@ class EmailServices:
             json_data: The JSON payload containing email data.
 
         Returns:
-            A tuple containing a message and the HTTP status code.
+            A tuple containing a message with the new email's id and created_at,
+            and the HTTP status code.
 
         Raises:
-            ValueError: If any required data is invalid.
+            ValueError: If the payload is not an object or any required data
+                is invalid.
             LookupError: If a user cannot be found.
             Exception: For other unexpected errors.
         """
         try:
+            if not isinstance(json_data, dict):
+                raise ValueError("Expected a JSON object.")
             email = self.create_email(json_data)
-            self.email_repo.send_email(email)
-            return {"message": "Email was successfully sent."}, 201
+            row = self.email_repo.send_email(email)
+            if row is None:
+                # The insert checks the users itself; only look up which
+                # one is missing when it fails.
+                self.check_valid_users(email.recipient_username, email.sender_username)
+                raise LookupError("The sender or recipient does not exist in the database.")
+            return {
+                "message": "Email was successfully sent.",
+                "id": row["id"],
+                "created_at": row["created_at"],
+            }, 201
+
+        except ValueError as ve:
+            return {"error": str(ve)}, 400
+        except LookupError as le:
+            return {"error": str(le)}, 404
+        except Exception as e:
+            return {"error": f"An unexpected error occurred: {str(e)}"}, 500
+
+    def handle_send_emails(self, json_data: Any) -> Tuple[Dict[str, str], int]:
+        """
+        Send a batch of emails based on the JSON payload. Either every email
+        in the batch is sent or none of them are. The users of the whole batch
+        are looked up in a single query.
+
+        Args:
+            json_data: A list of JSON objects, each containing email data.
+
+        Returns:
+            A tuple containing a message and the HTTP status code.
+
+        Raises:
+            ValueError: If the payload is not a list of at most _MAX_BATCH
+                objects or any email is invalid.
+            LookupError: If a user cannot be found.
+            Exception: For other unexpected errors.
+        """
+        try:
+            if not isinstance(json_data, list) or not json_data:
+                raise ValueError("Expected a non-empty list of emails.")
+            if len(json_data) > _MAX_BATCH:
+                raise ValueError(f"Cannot send more than {_MAX_BATCH} emails at once.")
+            for index, data in enumerate(json_data):
+                if not isinstance(data, dict):
+                    raise ValueError(f"Email at index {index} is not a JSON object.")
+            emails = [self.create_email(data) for data in json_data]
+            found = self.user_repo.users_exist(chain.from_iterable(
+                (email.recipient_username, email.sender_username) for email in emails))
+            for email in emails:
+                self._check_users_found(found, email.recipient_username, email.sender_username)
+            self.email_repo.send_emails(emails)
+            return {"message": f"{len(emails)} emails were successfully sent."}, 201
 
         except ValueError as ve:
             return {"error": str(ve)}, 400
@@ -244,7 +374,8 @@ class EmailServices:
 
     def create_email(self, json_data: Dict[str, Any]) -> Email:
         """
-        Create an Email object from JSON payload.
+        Create and validate an Email object from JSON payload. Whether its
+        users exist is checked by the caller.
 
         Args:
             json_data: The JSON payload containing email data.
@@ -254,15 +385,10 @@ class EmailServices:
 
         Raises:
             ValueError: If any required data is invalid.
-            LookupError: If a user cannot be found.
         """
-        message_subject, body, sender_username, recipient_username = self.fetch_send_args(
-            json_data)
-        self._validate_send_args(
-            message_subject, sender_username, recipient_username)
-        self.check_valid_users(recipient_username, sender_username)
-
-        return Email(message_subject, body, sender_username, recipient_username)
+        email = Email(*self.fetch_send_args(json_data))
+        email.validate()
+        return email
 
     def fetch_send_args(self, data: Dict[str, Any]) -> Tuple[str, str, str, str]:
         """
@@ -286,18 +412,33 @@ class EmailServices:
 
     def check_valid_users(self, recipient_username: str, sender_username: str) -> None:
         """
-        Check if both the recipient and sender users are valid.
+        Check if both the recipient and sender users are valid, with one query.
+
+        Args:
+            recipient_username: The recipient's username.
+            sender_username: The sender's username.
+
+        Raises:
+            LookupError: If either user does not exist.
+        """
+        found = self.user_repo.users_exist((recipient_username, sender_username))
+        self._check_users_found(found, recipient_username, sender_username)
+
+    def _check_users_found(self, found: Set[str], recipient_username: str, sender_username: str) -> None:
+        """
+        Check the recipient and sender against the result of users_exist.
 
         Args:
+            found: The usernames that exist.
             recipient_username: The recipient's username.
             sender_username: The sender's username.
 
         Raises:
             LookupError: If either user does not exist.
         """
-        if not self.user_repo.user_exists(recipient_username):
+        if recipient_username not in found:
             raise LookupError("The recipient does not exist in the database.")
-        if not self.user_repo.user_exists(sender_username):
+        if sender_username not in found:
             raise LookupError("The sender does not exist in the database.")
 
     def handle_delete_email(self, email_id: int) -> Tuple[Dict[str, str], int]:
@@ -311,13 +452,14 @@ class EmailServices:
             A tuple with a success message or error and the corresponding HTTP status code.
 
         Raises:
-            ValueError: If email_id is invalid or the email cannot be deleted.
             LookupError: If the email does not exist.
             Exception: For other unexpected errors.
         """
         try:
-            self._validate_email_exists(email_id)
-            self._delete_email_from_db(email_id)
+            # DELETE ... RETURNING tells whether the email existed, so no
+            # separate existence check is made.
+            if self.email_repo.delete_email(email_id) is None:
+                raise LookupError(f"Email with ID {email_id} not found")
 
             return {"message": f"Email with id {email_id} was successfully deleted from the database."}, 200
 
@@ -327,31 +469,3 @@ class EmailServices:
             return {"error": str(le)}, 404
         except Exception as e:
             return {"error": f"An unexpected error occurred: {str(e)}"}, 500
-
-    def _validate_email_exists(self, email_id: int) -> None:
-        """
-        Validates if the email exists in the database.
-
-        Args:
-            email_id: The ID of the email to validate.
-
-        Raises:
-            LookupError: If the email does not exist in the database.
-        """
-        if not self.email_repo.email_exists(email_id):
-            raise LookupError(
-                f"Email with ID {email_id} not found in database.")
-
-    def _delete_email_from_db(self, email_id: int) -> None:
-        """
-        Deletes the email from the database.
-
-        Args:
-            email_id: The ID of the email to delete.
-
-        Raises:
-            ValueError: If the email could not be deleted.
-        """
-        response = self.email_repo.delete_email(email_id)
-        if response.rowcount <= 0:
-            raise ValueError("The email could not be deleted.")
@@ -1,4 +1,6 @@
-from typing import Tuple, Dict, Any
+from typing import Optional, Tuple, Dict, Any
+from flaskr.cache import TTLCache
+from flaskr.exceptions import ConflictError
 from flaskr.models.user_model import User
 from flaskr.repositories.user_repo import UserRepository
 
@@ -11,17 +13,22 @@ class UserServices:
     Attributes:
         db: The database connection object.
         user_repo: Repository for user operations.
+        password_hash_method: The Werkzeug method used to hash new passwords.
     """
 
-    def __init__(self, db: Any) -> None:
+    def __init__(self, db: Any, user_cache: Optional[TTLCache] = None,
+                 password_hash_method: str = "scrypt") -> None:
         """
         Initialize the UserService with a database connection.
 
         Args:
             db: The database connection object.
+            user_cache: Optional cache for user existence lookups.
+            password_hash_method: The Werkzeug method used to hash new passwords.
         """
         self.db = db
-        self.user_repo = UserRepository(db)
+        self.user_repo = UserRepository(db, user_cache)
+        self.password_hash_method = password_hash_method
 
     def format_register_request(self, json_data: Dict[str, Any]) -> Tuple[str, str]:
         """
@@ -35,7 +42,7 @@ class UserServices:
         """
         return json_data.get("username"), json_data.get("password")
 
-    def handle_register_user(self, data: Dict[str, Any]) -> Tuple[Dict[str, str], int]:
+    def handle_register_user(self, data: Any) -> Tuple[Dict[str, str], int]:
         """
         Handle the user registration process.
 
@@ -46,13 +53,19 @@ class UserServices:
             A tuple containing a success message or error and the corresponding HTTP status code.
 
         Raises:
-            ValueError: If any registration data is invalid.
+            ValueError: If the payload is not an object or any registration
+                data is invalid.
+            ConflictError: If the username already exists.
             Exception: For other unexpected errors.
         """
         try:
+            if not isinstance(data, dict):
+                raise ValueError("Expected a JSON object.")
             user = self.create_user(data)
             self._register_user(user)
             return {"message": f"User {user.username} registered successfully."}, 201
+        except ConflictError as ce:
+            return {"error": str(ce)}, 409
         except ValueError as ve:
             return {"error": str(ve)}, 400  # Bad Request
         except KeyError as ke:
@@ -68,14 +81,15 @@ class UserServices:
             data: The JSON data containing the user's registration details.
 
         Returns:
-            A User object constructed from the provided data.
+            A User object with its password hashed and the plaintext dropped.
 
         Raises:
             ValueError: If the username or password is invalid.
         """
-        username, password = self._fetch_register_args(data)
-        self._check_user_validity(username, password)
-        return User(username, password)
+        user = User(*self._fetch_register_args(data))
+        user.is_valid()
+        user.hash_password(self.password_hash_method)
+        return user
 
     def _register_user(self, user: User) -> None:
         """
@@ -85,11 +99,10 @@ class UserServices:
             user: The User object to register.
 
         Raises:
-            ValueError: If the user could not be registered.
+            ConflictError: If the username already exists.
         """
-        response = self.user_repo.register_user(user)
-        if response.rowcount <= 0:
-            raise ValueError("Could not register user.")
+        if self.user_repo.register_user(user) is None:
+            raise ConflictError("Username already exists.")
 
     def _fetch_register_args(self, data: Dict[str, Any]) -> Tuple[str, str]:
         """
@@ -104,54 +117,10 @@ class UserServices:
         Raises:
             KeyError: If the username or password is not provided.
         """
-        try:
-            return data["username"], data["password"]
-        except KeyError as ke:
-            raise KeyError(f"Missing required field: {str(ke)}") from ke
-
-    def _check_user_validity(self, username: str, password: str) -> None:
-        """
-        Validate the user's username and password.
-
-        Args:
-            username: The user's username.
-            password: The user's password.
-
-        Raises:
-            ValueError: If the username or password is invalid or already exists.
-        """
-        self._check_username_validity(username)
-        self._check_password_validity(password)
-        if self.user_repo.user_exists(username):
-            raise ValueError("Username already exists.")
-
-    def _check_username_validity(self, username: str) -> None:
-        """
-        Validate the username.
-
-        Args:
-            username: The username to validate.
-
-        Raises:
-            ValueError: If the username is invalid.
-        """
-        if not username:
-            raise ValueError("A user must have a username.")
-        elif len(username) < 2:
-            raise ValueError("Username must be at least 2 characters long.")
-
-    def _check_password_validity(self, password: str) -> None:
-        """
-        Validate the password.
-
-        Args:
-            password: The password to validate.
-
-        Raises:
-            ValueError: If the password is invalid.
-        """
-        if not password:
-            raise ValueError("A user must have a password.")
-        elif len(password) < 2:
-            raise ValueError(
-                "The password must be at least 2 characters long.")
+        username = data.get("username")
+        if username is None:
+            raise KeyError("Missing required field: 'username'")
+        password = data.get("password")
+        if password is None:
+            raise KeyError("Missing required field: 'password'")
+        return username, password
@@ -1,10 +1,14 @@
 import requests
 import json
 import random
+from concurrent.futures import ThreadPoolExecutor
 
 # Define the base URL for the API
 BASE_URL = 'http://127.0.0.1:5000'
 
+# Reuse one keep-alive connection for every request instead of opening a new one per POST
+session = requests.Session()
+
 # Function to register a user
 def register_user(username, password):
     url = f"{BASE_URL}/register"
@@ -15,23 +19,18 @@ def register_user(username, password):
     headers = {
         "Content-Type": "application/json"
     }
-    response = requests.post(url, headers=headers, data=payload)
+    response = session.post(url, headers=headers, data=payload)
     print(f"Register User Response: {response.status_code} - {response.text}")
 
-# Function to send an email
-def send_email(subject, body, sender, recipient):
-    url = f"{BASE_URL}/emails"
-    payload = json.dumps({
-        "message_subject": subject,
-        "body": body,
-        "sender_username": sender,
-        "recipient_username": recipient
-    })
+# Function to send a batch of emails in one request and one transaction
+def send_emails(emails):
+    url = f"{BASE_URL}/emails/bulk"
+    payload = json.dumps(emails)
     headers = {
         "Content-Type": "application/json"
     }
-    response = requests.post(url, headers=headers, data=payload)
-    print(f"Send Email Response: {response.status_code} - {response.text}")
+    response = session.post(url, headers=headers, data=payload)
+    print(f"Send Emails Response: {response.status_code} - {response.text}")
 
 # Generate random data
 def generate_random_data():
@@ -41,18 +40,22 @@ def generate_random_data():
     usernames = [f"user{i}" for i in range(1, 11)]  # Create 10 unique users
     passwords = ["password" + str(i) for i in range(1, 11)]  # Corresponding passwords
 
-    # Register users
-    for username, password in zip(usernames, passwords):
-        register_user(username, password)
+    # Register users concurrently; each registration hashes a password on the server
+    with ThreadPoolExecutor(max_workers=len(usernames)) as executor:
+        list(executor.map(register_user, usernames, passwords))
     
-    # Send 10 messages to each user
+    # Send 10 messages from each user
+    emails = []
     for sender in usernames:
         recipients = [recipient for recipient in usernames if recipient != sender]
         for _ in range(10):  # Send 10 emails per user
-            recipient = random.choice(recipients)
-            subject = random.choice(subjects)
-            body = random.choice(bodies)
-            send_email(subject, body, sender, recipient)
+            emails.append({
+                "message_subject": random.choice(subjects),
+                "body": random.choice(bodies),
+                "sender_username": sender,
+                "recipient_username": random.choice(recipients)
+            })
+    send_emails(emails)
 
 if __name__ == "__main__":
     generate_random_data()
@@ -1,18 +1,27 @@
-import os
-import tempfile
+import sqlite3
+import uuid
 import pytest
-from flask import Flask, jsonify, request
 from flaskr import create_app
 from flaskr.db import get_db, init_db
+from flaskr.models.email_model import Email
+from flaskr.repositories.email_repo import EmailRepository
 from faker import Faker
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def app():
-    db_fd, db_path = tempfile.mkstemp()
+    # The app and its schema are built once per session (once per worker under
+    # pytest-xdist); clean_db empties the tables between tests. The database
+    # lives in memory, shared by the pool's connections, and is kept alive by
+    # holding one connection open for the session.
+    db_uri = f"file:flaskr-test-{uuid.uuid4().hex}?mode=memory&cache=shared"
+    keep_alive = sqlite3.connect(db_uri, uri=True)
     app = create_app({
         'TESTING': True,
-        'DATABASE': db_path,
+        'DATABASE': db_uri,
+        'DB_EXTRA_PRAGMAS': ('PRAGMA synchronous=OFF',),
+        # A single PBKDF2 iteration keeps registration cheap in tests.
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1',
     })
 
     with app.app_context():
@@ -20,13 +29,47 @@ def app():
 
     yield app
 
-    os.close(db_fd)
-    os.unlink(db_path)
+    app.extensions['db_pool'].close()
+    keep_alive.close()
 
 
-@pytest.fixture
+# Installed while a module shares populated data (see populate_emails), so a
+# test that writes by mistake fails instead of changing the data of the next.
+READ_ONLY_TRIGGERS = [
+    (f"read_only_{table}_{action.lower()}", table, action)
+    for table in ("email", "user")
+    for action in ("INSERT", "UPDATE", "DELETE")
+]
+
+
+def empty_db(app):
+    with app.app_context():
+        get_db().executescript("""
+            BEGIN;
+            DELETE FROM email;
+            DELETE FROM user;
+            DELETE FROM sqlite_sequence;
+            COMMIT;
+        """)
+    app.extensions['user_cache'].clear()
+
+
+@pytest.fixture(autouse=True)
+def clean_db(request, app):
+    yield
+
+    if "populate_emails" in request.fixturenames:
+        # The data is shared by the module and removed by populate_emails.
+        app.extensions['user_cache'].clear()
+    else:
+        empty_db(app)
+
+
+@pytest.fixture(scope="session")
 def client(app):
-    return app.test_client()
+    # The app sets no cookies, so a cookie-less client carries no state
+    # from one test to the next and can be shared by the whole session.
+    return app.test_client(use_cookies=False)
 
 
 @pytest.fixture
@@ -36,6 +79,10 @@ def runner(app):
 
 @pytest.fixture
 def register_users(client):
+    return _register_users(client)
+
+
+def _register_users(client):
     # Define and register users
     user1 = {
         "username": "tester1",
@@ -56,15 +103,40 @@ def register_users(client):
     return user1, user2
 
 
-@pytest.fixture
-def populate_emails(client, register_users):
-    _, _ = register_users
-    fake = Faker()
-    num_of_emails = 10
-    for _ in range(num_of_emails):
-        email = {
-            "message_subject": fake.sentence(), "body": fake.text(), "sender_username": "tester1", "recipient_username": "tester2"
-        }
-        response = client.post('/emails', json=email)
-        assert response.status_code == 201
-    return num_of_emails
+@pytest.fixture(scope="session")
+def fake():
+    return Faker()
+
+
+@pytest.fixture(scope="session")
+def email_payloads(fake):
+    # Generating fake text is slow, so the payloads are built once per session
+    # and shared by every test that populates the database.
+    return [
+        {"message_subject": fake.sentence(), "body": fake.text(), "sender_username": "tester1", "recipient_username": "tester2"}
+        for _ in range(10)
+    ]
+
+
+@pytest.fixture(scope="module")
+def populate_emails(app, client, email_payloads):
+    # Populated once and shared by every test of a module, so only use it in
+    # modules whose tests only read: writes fail while the data is shared.
+    # The emails are inserted straight through the repository in one
+    # transaction; the HTTP send paths have their own tests.
+    _register_users(client)
+    with app.app_context():
+        db = get_db()
+        EmailRepository(db).send_emails(
+            [Email(**payload) for payload in email_payloads])
+        db.executescript("".join(
+            f"CREATE TRIGGER {name} BEFORE {action} ON {table} "
+            f"BEGIN SELECT RAISE(ABORT, 'write in a read-only test'); END;"
+            for name, table, action in READ_ONLY_TRIGGERS))
+
+    yield len(email_payloads)
+
+    with app.app_context():
+        get_db().executescript("".join(
+            f"DROP TRIGGER {name};" for name, _, _ in READ_ONLY_TRIGGERS))
+    empty_db(app)
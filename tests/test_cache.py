@@ -0,0 +1,106 @@
+import pytest
+
+from flaskr.cache import TTLCache
+from flaskr.db import get_db
+from flaskr.models.user_model import User
+from flaskr.repositories.user_repo import UserRepository
+
+
+def test_ttl_cache_expires_entries():
+    now = [0.0]
+    cache = TTLCache(maxsize=10, ttl=5, timer=lambda: now[0])
+
+    cache.set("tester1", True)
+    assert cache.get("tester1") is True
+
+    now[0] = 5.0
+    assert cache.get("tester1") is None
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+
+    cache.set("tester1", True)
+    cache.set("tester2", True)
+    cache.get("tester1")
+    cache.set("tester3", True)
+
+    assert cache.get("tester1") is True
+    assert cache.get("tester2") is None
+    assert cache.get("tester3") is True
+
+
+def test_user_exists_caches_lookups(app, client, register_users):
+    _, _ = register_users
+
+    response = client.get('/emails?recipient_username=tester2')
+    assert response.status_code == 200
+    assert response.get_json()["emails"] == []
+    response = client.get('/emails?recipient_username=thisUserDoesNotExist')
+    assert response.status_code == 404
+
+    cache = app.extensions['user_cache']
+    assert cache.get("tester2") is True
+    assert cache.get("thisUserDoesNotExist") is False
+
+
+def test_registering_a_cached_missing_user(client, register_users):
+    _, _ = register_users
+
+    response = client.get('/emails?recipient_username=tester3')
+    assert response.status_code == 404
+
+    response = client.post('/register', json={"username": "tester3", "password": "1234"})
+    assert response.status_code == 201
+
+    response = client.get('/emails?recipient_username=tester3')
+    assert response.status_code == 200
+
+
+def test_register_user_invalidates_cached_lookup(app, client):
+    cache = app.extensions['user_cache']
+    cache.set("tester3", False)
+
+    response = client.post('/register', json={"username": "tester3", "password": "1234"})
+    assert response.status_code == 201
+    assert cache.get("tester3") is None
+
+
+class _RegisterDuringLookup:
+    """
+    Wraps a connection so that, right after the first existence query reads
+    its result, another request registers the user being looked up.
+    """
+
+    def __init__(self, db, register):
+        self._db = db
+        self._register = register
+
+    def execute(self, sql, params=()):
+        rows = self._db.execute(sql, params).fetchall()
+        if self._register is not None:
+            register, self._register = self._register, None
+            register()
+        return _Rows(rows)
+
+
+class _Rows(list):
+    def fetchone(self):
+        return self[0] if self else None
+
+
+@pytest.mark.parametrize("lookup", [
+    lambda repo: repo.user_exists("tester3"),
+    lambda repo: "tester3" in repo.users_exist(["tester3"]),
+])
+def test_registration_during_lookup_is_not_cached_as_missing(app, lookup):
+    with app.app_context():
+        db = get_db()
+        cache = app.extensions['user_cache']
+        user = User("tester3", "1234")
+        user.hash_password("pbkdf2:sha256:1")
+        register = lambda: UserRepository(db, cache).register_user(user)
+
+        assert lookup(UserRepository(_RegisterDuringLookup(db, register), cache)) is False
+        assert cache.get("tester3") is None
+        assert UserRepository(db, cache).user_exists("tester3") is True
@@ -0,0 +1,38 @@
+import pytest
+
+from flaskr.db import ConnectionPool, get_db, transaction
+from flaskr.models.email_model import Email
+from flaskr.repositories.email_repo import EmailRepository
+
+
+def test_connection_uses_wal(tmp_path):
+    # The test app runs in memory, where SQLite has no WAL, so this checks a
+    # pool over a database file.
+    pool = ConnectionPool(str(tmp_path / "flaskr.sqlite"))
+    db = pool.acquire()
+    try:
+        assert db.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        assert db.execute('PRAGMA synchronous').fetchone()[0] == 1
+    finally:
+        db.close()
+        pool.close()
+
+
+def test_transaction_rolls_back_on_error(app, register_users):
+    _, _ = register_users
+    with app.app_context():
+        db = get_db()
+        with pytest.raises(RuntimeError):
+            with transaction(db):
+                EmailRepository(db).send_email(
+                    Email("Test Subject", "Test Body", "tester1", "tester2"))
+                raise RuntimeError()
+
+        assert db.execute("SELECT COUNT(*) FROM email").fetchone()[0] == 0
+
+
+def test_connections_are_reused_across_requests(app):
+    with app.app_context():
+        first = get_db()
+    with app.app_context():
+        assert get_db() is first
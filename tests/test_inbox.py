@@ -1,3 +1,11 @@
+import pytest
+from werkzeug.datastructures import MultiDict
+
+from flaskr.db import get_db
+from flaskr.repositories.email_repo import EmailRepository
+from flaskr.services.email_services import EmailServices
+
+
 def test_register_user(client, app):
     """
     Test the user registration endpoint.
@@ -47,116 +55,6 @@ def test_get_empty_email_db(client, register_users):
     assert len(emails) == 0
 
 
-def test_get_indexed_emails(client, populate_emails):
-    """
-    Test fetching a range of emails from the database.
-
-    Args:
-        client: The test client for making requests.
-        populate_emails: Fixture to populate the database with emails.
-        register_users: Fixture to register users before the test.
-
-    Steps:
-        1. Ensure the database is populated with emails and users are registered.
-        2. Define the range (start, stop) of emails to fetch.
-        3. Make a GET request to the '/emails' endpoint with the start, stop, and recipient username.
-        4. Assert that the number of emails fetched matches the defined range.
-        5. Assert that the emails are sorted by the 'created_at' field in descending order.
-    """
-    _ = populate_emails
-    start, stop = 3, 5
-    num_of_emails = stop - start
-    recipient_username = "tester2"
-
-    response = client.get(
-        f'/emails?start={start}&stop={stop}&recipient_username={recipient_username}')
-    emails = response.get_json()["emails"]
-
-    assert num_of_emails == len(emails)
-    for i in range(len(emails) - 1):
-        assert emails[i]["created_at"] <= emails[i + 1]["created_at"]
-
-
-def test_get_all_emails_to_user_x(client, populate_emails):
-    """
-    Test fetching all emails sent to a specific user.
-
-    Args:
-        client: The test client for making requests.
-        populate_emails: Fixture to populate the database with emails.
-
-    Steps:
-        1. Ensure the database is populated with emails and users are registered.
-        2. Define the recipient username.
-        3. Make a GET request to the '/emails' endpoint for the specified recipient.
-        4. Assert that the response status code is 200 (OK).
-        5. Assert that all fetched emails have the correct recipient username.
-    """
-    _ = populate_emails
-    recipient_username = "tester1"
-
-    response = client.get(f'/emails?recipient_username={recipient_username}')
-    emails = response.get_json()["emails"]
-
-    assert response.status_code == 200
-    for email in emails:
-        assert email["recipient_username"] == recipient_username
-
-
-def test_get_emails_with_empty_recipient(client, populate_emails):
-    """
-    Test the behavior when querying emails with an empty recipient username.
-
-    Args:
-        client: The test client for sending HTTP requests.
-        populate_emails: Fixture to populate the database with test emails.
-        register_users: Fixture to register test users.
-    """
-    _ = populate_emails
-
-    # Send a GET request with an empty recipient_username
-    response = client.get('/emails?recipient_username=')
-
-    # Check if the status code is 400 Bad Request
-    assert response.status_code == 400
-
-    # Check if the response is JSON
-    assert response.is_json
-
-    # Get the response JSON data
-    response_data = response.get_json()
-
-    # Verify the error message in the response
-    assert "error" in response_data
-
-
-def test_get_emails_to_non_existing_users(client, populate_emails):
-    """
-    Test the behavior when querying emails with a non-existent username.
-
-    Args:
-        client: The test client for sending HTTP requests.
-        populate_emails: Fixture to populate the database with test emails.
-        register_users: Fixture to register test users.
-    """
-    _ = populate_emails
-
-    # Send a GET request with an empty recipient_username
-    response = client.get('/emails?recipient_username=thisUserDoesNotExist')
-
-    # Check if the status code is 404 Not Found
-    assert response.status_code == 404
-
-    # Check if the response is JSON
-    assert response.is_json
-
-    # Get the response JSON data
-    response_data = response.get_json()
-
-    # Verify the error message in the response
-    assert "error" in response_data
-
-
 def test_send_email(client, register_users):
     """
     Test the email sending functionality.
@@ -169,8 +67,8 @@ def test_send_email(client, register_users):
         1. Ensure users are registered.
         2. Define the email data to be sent.
         3. Make a POST request to the '/emails' endpoint with the email data.
-        4. Make a GET request to the '/emails' endpoint for the recipient.
-        5. Assert that the sent email is present in the fetched emails.
+        4. Fetch the email by the id returned from the POST request.
+        5. Assert that the stored email matches the sent data.
     """
     _, _ = register_users
     recipient_username = "tester2"
@@ -183,13 +81,15 @@ def test_send_email(client, register_users):
     }
     response = client.post('/emails', json=new_email)
     assert response.status_code == 201
+    email_id = response.get_json()["id"]
 
-    response = client.get(f'/emails?recipient_username={recipient_username}')
+    response = client.get(f'/emails/{email_id}')
 
     assert response.status_code == 200
-    emails = response.get_json()["emails"]
+    email = response.get_json()["email"]
 
-    assert any(email['message_subject'] == 'Test Subject' for email in emails)
+    assert email['message_subject'] == 'Test Subject'
+    assert email['recipient_username'] == recipient_username
 
 
 def test_send_email_with_empty_sender_username(client, register_users):
@@ -232,12 +132,12 @@ def test_delete_email(client, register_users):
 
     Steps:
         1. Ensure users are registered.
-        2. Define the email data to be sent and send the email.
-        3. Make a GET request to fetch the email and extract its ID.
-        4. Make a DELETE request to the '/emails' endpoint with the email ID.
-        5. Assert that the response status code is 200 (OK).
-        6. Make another GET request to ensure the email has been deleted.
-        7. Assert that the deleted email is no longer present in the fetched emails.
+        2. Define the email data to be sent, send the email and take its ID
+           from the response.
+        3. Make a DELETE request to the '/emails' endpoint with the email ID.
+        4. Assert that the response status code is 200 (OK).
+        5. Make a GET request to ensure the email has been deleted.
+        6. Assert that the deleted email is no longer present in the fetched emails.
     """
     _, _ = register_users
     recipient_username = "tester2"
@@ -248,20 +148,228 @@ def test_delete_email(client, register_users):
         'sender_username': "tester1",
         'recipient_username': recipient_username,
     }
-    client.post('/emails', json=new_email)
-
-    response = client.get(f'/emails?recipient_username={recipient_username}')
-    email = response.get_json()["emails"][0]
-    email_id = email['id']
+    email_id = client.post('/emails', json=new_email).get_json()["id"]
 
     response = client.delete(f'/emails/{email_id}')
     assert response.status_code == 200
 
     response = client.get(f'/emails?recipient_username={recipient_username}')
     emails = response.get_json()["emails"]
-    assert not any(e['id'] == email_id for e in emails)
+    assert email_id not in {e['id'] for e in emails}
 
 
 def test_delete_non_existent_email(client):
     response = client.delete(f'/emails/{1}')
     assert response.status_code == 404
+    assert response.get_json()["error"] == "Email with ID 1 not found"
+
+
+def test_send_emails_in_bulk(client, register_users):
+    """
+    Test sending a batch of emails in a single request.
+
+    Args:
+        client: The test client for making requests.
+        register_users: Fixture to register users before the test.
+    """
+    _, _ = register_users
+    recipient_username = "tester2"
+
+    new_emails = [{
+        'message_subject': f'Bulk Subject {i}',
+        'body': 'Test Body',
+        'sender_username': "tester1",
+        'recipient_username': recipient_username,
+    } for i in range(3)]
+    response = client.post('/emails/bulk', json=new_emails)
+    assert response.status_code == 201
+
+    response = client.get(f'/emails?recipient_username={recipient_username}')
+    emails = response.get_json()["emails"]
+    assert len(emails) == len(new_emails)
+
+
+def test_send_emails_in_bulk_is_atomic(client, register_users):
+    _, _ = register_users
+    recipient_username = "tester2"
+
+    new_emails = [{
+        'message_subject': 'Test Subject',
+        'body': 'Test Body',
+        'sender_username': "tester1",
+        'recipient_username': recipient_username,
+    }, {
+        'message_subject': 'Test Subject',
+        'body': 'Test Body',
+        'sender_username': "tester1",
+        'recipient_username': "thisUserDoesNotExist",
+    }]
+    response = client.post('/emails/bulk', json=new_emails)
+    assert response.status_code == 404
+
+    response = client.get(f'/emails?recipient_username={recipient_username}')
+    assert len(response.get_json()["emails"]) == 0
+
+
+@pytest.mark.parametrize("payload, error", [
+    ([1, 2], "Email at index 0 is not a JSON object."),
+    ([{}] * 101, "Cannot send more than 100 emails at once."),
+])
+def test_send_emails_in_bulk_invalid_payload(client, payload, error):
+    response = client.post('/emails/bulk', json=payload)
+
+    assert response.status_code == 400
+    assert response.get_json()["error"] == error
+
+
+def test_recipient_queries_use_covering_index(app):
+    """
+    Test that fetching a user's emails is served by a covering index range
+    scan, without a separate sort step or table lookups.
+
+    Args:
+        app: The application instance.
+    """
+    queries = [
+        (EmailRepository._Q_GET_ALL_TO_USER, ("tester2",)),
+        (EmailRepository._Q_GET_INDEXED, ("tester2", 10, 0)),
+        (EmailRepository._Q_GET_FIRST_PAGE, ("tester2", 10)),
+        (EmailRepository._Q_GET_PAGE_AFTER, ("tester2", "2024-01-01 00:00:00", 1, 10)),
+    ]
+    with app.app_context():
+        db = get_db()
+        for query, params in queries:
+            plan = db.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+            details = " ".join(row["detail"] for row in plan)
+            assert "COVERING INDEX idx_email_recipient_covering" in details
+            assert "TEMP B-TREE" not in details
+
+
+def test_send_email_returns_id(client, register_users):
+    _, _ = register_users
+
+    new_email = {
+        'message_subject': 'Test Subject',
+        'body': 'Test Body',
+        'sender_username': "tester1",
+        'recipient_username': "tester2",
+    }
+    response = client.post('/emails', json=new_email)
+    assert response.status_code == 201
+
+    data = response.get_json()
+    assert isinstance(data["id"], int)
+    assert data["created_at"]
+
+
+def test_send_email_with_too_long_subject(client, register_users):
+    _, _ = register_users
+
+    new_email = {
+        'message_subject': 'x' * 256,
+        'body': 'Test Body',
+        'sender_username': "tester1",
+        'recipient_username': "thisUserDoesNotExist",
+    }
+    response = client.post('/emails', json=new_email)
+
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "Subject cannot exceed 255 characters."
+
+
+@pytest.mark.parametrize("field", ['message_subject', 'body', 'sender_username'])
+def test_send_email_with_non_string_field(client, register_users, field):
+    _, _ = register_users
+
+    new_email = {
+        'message_subject': 'Test Subject',
+        'body': 'Test Body',
+        'sender_username': "tester1",
+        'recipient_username': "tester2",
+    }
+    new_email[field] = 5
+    response = client.post('/emails', json=new_email)
+
+    assert response.status_code == 400
+    assert response.get_json()["error"].endswith("must be a string.")
+
+
+def test_get_email_by_id(client, register_users):
+    _, _ = register_users
+
+    new_email = {
+        'message_subject': 'Test Subject',
+        'body': 'Test Body',
+        'sender_username': "tester1",
+        'recipient_username': "tester2",
+    }
+    email_id = client.post('/emails', json=new_email).get_json()["id"]
+
+    response = client.get(f'/emails/{email_id}')
+    assert response.status_code == 200
+
+    email = response.get_json()["email"]
+    assert email["id"] == email_id
+    assert email["body"] == 'Test Body'
+
+    response = client.get(f'/emails/{email_id + 1}')
+    assert response.status_code == 404
+
+
+def test_send_email_without_json_body(client, register_users):
+    _, _ = register_users
+
+    response = client.post('/emails', data="not json")
+
+    assert response.status_code == 400
+
+
+def test_send_email_with_json_array_body(client, register_users):
+    _, _ = register_users
+
+    response = client.post('/emails', json=[{'message_subject': 'Test Subject'}])
+
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "Expected a JSON object."
+
+
+def test_handle_get_emails_without_request_context(app, register_users):
+    _, _ = register_users
+    with app.app_context():
+        email_service = EmailServices(get_db())
+
+        message, status_code = email_service.handle_get_emails(
+            MultiDict({"recipient_username": "tester2"}))
+        assert status_code == 200
+        assert list(message["emails"]) == []
+
+        _, status_code = email_service.handle_get_emails(MultiDict())
+        assert status_code == 400
+
+
+def test_send_email_with_non_existent_sender(client, register_users):
+    _, user2 = register_users
+
+    new_email = {
+        'message_subject': 'Test Subject',
+        'body': 'Test Body',
+        'sender_username': "thisUserDoesNotExist",
+        'recipient_username': user2["username"],
+    }
+    response = client.post('/emails', json=new_email)
+
+    assert response.status_code == 404
+    assert response.get_json()["error"] == "The sender does not exist in the database."
+
+
+@pytest.mark.parametrize("query", [
+    'start=abc&stop=5',
+    'start=-1&stop=5',
+    'start=0&stop=xyz',
+    'start=5&stop=5',
+])
+def test_get_emails_invalid_indexes(client, register_users, query):
+    _, _ = register_users
+
+    response = client.get(f'/emails?{query}&recipient_username=tester2')
+    assert response.status_code == 400
@@ -0,0 +1,205 @@
+import base64
+import pytest
+
+
+# Every test in this module only reads: they share the emails that the
+# module-scoped populate_emails fixture inserts once.
+
+
+def test_get_indexed_emails(client, populate_emails):
+    """
+    Test fetching a range of emails from the database.
+
+    Args:
+        client: The test client for making requests.
+        populate_emails: Fixture to populate the database with emails.
+
+    Steps:
+        1. Ensure the database is populated with emails and users are registered.
+        2. Define the range (start, stop) of emails to fetch.
+        3. Make a GET request to the '/emails' endpoint with the start, stop, and recipient username.
+        4. Assert that the number of emails fetched matches the defined range.
+        5. Assert that the emails are ordered newest first.
+    """
+    _ = populate_emails
+    start, stop = 3, 5
+    num_of_emails = stop - start
+    recipient_username = "tester2"
+
+    response = client.get(
+        f'/emails?start={start}&stop={stop}&recipient_username={recipient_username}')
+    data = response.get_json()
+    emails = data["emails"]
+
+    assert num_of_emails == len(emails)
+    assert data["total"] == populate_emails
+    ids = [email["id"] for email in emails]
+    assert ids == sorted(ids, reverse=True)
+
+
+def test_get_all_emails_to_user_x(client, populate_emails):
+    """
+    Test fetching all emails sent to a specific user.
+
+    Args:
+        client: The test client for making requests.
+        populate_emails: Fixture to populate the database with emails.
+
+    Steps:
+        1. Ensure the database is populated with emails and users are registered.
+        2. Define the recipient username.
+        3. Make a GET request to the '/emails' endpoint for the specified recipient.
+        4. Assert that the response status code is 200 (OK).
+        5. Assert that all fetched emails have the correct recipient username.
+    """
+    _ = populate_emails
+    recipient_username = "tester1"
+
+    response = client.get(f'/emails?recipient_username={recipient_username}')
+    emails = response.get_json()["emails"]
+
+    assert response.status_code == 200
+    for email in emails:
+        assert email["recipient_username"] == recipient_username
+
+
+def test_get_emails_with_empty_recipient(client, populate_emails):
+    """
+    Test the behavior when querying emails with an empty recipient username.
+
+    Args:
+        client: The test client for sending HTTP requests.
+        populate_emails: Fixture to populate the database with test emails.
+        register_users: Fixture to register test users.
+    """
+    _ = populate_emails
+
+    # Send a GET request with an empty recipient_username
+    response = client.get('/emails?recipient_username=')
+
+    # Check if the status code is 400 Bad Request
+    assert response.status_code == 400
+
+    # Check if the response is JSON
+    assert response.is_json
+
+    # Get the response JSON data
+    response_data = response.get_json()
+
+    # Verify the error message in the response
+    assert "error" in response_data
+
+
+def test_get_emails_to_non_existing_users(client, populate_emails):
+    """
+    Test the behavior when querying emails with a non-existent username.
+
+    Args:
+        client: The test client for sending HTTP requests.
+        populate_emails: Fixture to populate the database with test emails.
+        register_users: Fixture to register test users.
+    """
+    _ = populate_emails
+
+    # Send a GET request with an empty recipient_username
+    response = client.get('/emails?recipient_username=thisUserDoesNotExist')
+
+    # Check if the status code is 404 Not Found
+    assert response.status_code == 404
+
+    # Check if the response is JSON
+    assert response.is_json
+
+    # Get the response JSON data
+    response_data = response.get_json()
+
+    # Verify the error message in the response
+    assert "error" in response_data
+
+
+def test_get_emails_with_cursor(client, populate_emails):
+    """
+    Test paging through every email with keyset (cursor) pagination.
+
+    Args:
+        client: The test client for making requests.
+        populate_emails: Fixture to populate the database with emails.
+
+    Steps:
+        1. Fetch the first page with only a limit.
+        2. Keep requesting pages with the returned 'next_cursor' until it is None.
+        3. Assert that every email was returned exactly once, newest first.
+    """
+    num_of_emails = populate_emails
+    recipient_username = "tester2"
+    limit = 3
+
+    response = client.get(
+        f'/emails?limit={limit}&recipient_username={recipient_username}')
+    assert response.status_code == 200
+    page = response.get_json()
+    ids = [email["id"] for email in page["emails"]]
+
+    while page["next_cursor"] is not None:
+        response = client.get(
+            f'/emails?limit={limit}&cursor={page["next_cursor"]}&recipient_username={recipient_username}')
+        assert response.status_code == 200
+        page = response.get_json()
+        ids.extend(email["id"] for email in page["emails"])
+
+    assert len(ids) == num_of_emails
+    assert ids == sorted(ids, reverse=True)
+
+
+def test_get_emails_with_invalid_cursor(client, populate_emails):
+    _ = populate_emails
+    response = client.get(
+        '/emails?limit=3&cursor=not-a-cursor&recipient_username=tester2')
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("query", [
+    'limit=101',
+    'limit=99999999999999999999',
+    'limit=3&cursor=' + base64.urlsafe_b64encode(
+        b'2024-01-01 00:00:00|99999999999999999999').decode('ascii'),
+    'start=0&stop=99999999999999999999',
+    'start=99999999999999999999&stop=999999999999999999999',
+])
+def test_get_emails_with_out_of_range_values(client, populate_emails, query):
+    _ = populate_emails
+    response = client.get(f'/emails?{query}&recipient_username=tester2')
+    assert response.status_code == 400
+
+
+def test_email_lists_omit_body(client, populate_emails):
+    _ = populate_emails
+
+    for query in ('recipient_username=tester2',
+                  'start=0&stop=5&recipient_username=tester2',
+                  'limit=5&recipient_username=tester2'):
+        emails = client.get(f'/emails?{query}').get_json()["emails"]
+        assert emails
+        assert {frozenset(email) for email in emails} == {frozenset((
+            "id", "message_subject", "sender_username", "recipient_username", "created_at"))}
+
+
+def test_get_indexed_emails_past_the_end(client, populate_emails):
+    num_of_emails = populate_emails
+
+    response = client.get(
+        f'/emails?start={num_of_emails}&stop={num_of_emails + 5}&recipient_username=tester2')
+    data = response.get_json()
+
+    assert data["emails"] == []
+    assert data["total"] == num_of_emails
+
+
+def test_get_paginated_emails_to_non_existing_user(client, populate_emails):
+    _ = populate_emails
+
+    response = client.get('/emails?limit=3&recipient_username=thisUserDoesNotExist')
+    assert response.status_code == 404
+
+    response = client.get('/emails?start=0&stop=3&recipient_username=thisUserDoesNotExist')
+    assert response.status_code == 404
@@ -0,0 +1,27 @@
+from datetime import datetime
+
+import orjson
+
+from flaskr import serialization
+from flaskr.serialization import iter_json
+
+
+def test_iter_json_streams_rows_in_chunks(monkeypatch):
+    monkeypatch.setattr(serialization, "CHUNK_SIZE", 32)
+    rows = ({"id": i, "message_subject": "Test Subject"} for i in range(10))
+
+    chunks = list(iter_json({"emails": rows, "total": 10}))
+
+    assert len(chunks) > 3
+    assert orjson.loads(b"".join(chunks)) == {
+        "emails": [{"id": i, "message_subject": "Test Subject"} for i in range(10)],
+        "total": 10,
+    }
+
+
+def test_jsonify_uses_orjson(app):
+    with app.app_context():
+        response = app.json.response({"id": 1, "created_at": datetime(2024, 1, 2, 3, 4, 5)})
+
+    assert response.mimetype == "application/json"
+    assert orjson.loads(response.data) == {"id": 1, "created_at": "2024-01-02T03:04:05+00:00"}
@@ -0,0 +1,78 @@
+import pytest
+from werkzeug.security import check_password_hash
+
+from flaskr.db import get_db
+from flaskr.models.user_model import User
+from flaskr.repositories.user_repo import UserRepository
+
+
+def test_register_duplicate_user(client, register_users):
+    user1, _ = register_users
+
+    response = client.post('/register', json=user1)
+
+    assert response.status_code == 409
+    assert response.get_json()["error"] == "Username already exists."
+
+
+def test_user_is_valid():
+    user = User("tester1", "1234")
+    assert user.is_valid()
+    assert user.password_hash is None
+    user.hash_password("pbkdf2:sha256:1")
+    assert user.password is None
+    assert user.check_password("1234")
+    with pytest.raises(ValueError, match="Username must be at least 2"):
+        User("t", "1234").is_valid()
+    with pytest.raises(ValueError, match="must have a password"):
+        User("tester1", "").is_valid()
+
+
+def test_register_user_stores_password_hash(app, client):
+    response = client.post('/register', json={"username": "tester1", "password": "1234"})
+    assert response.status_code == 201
+
+    with app.app_context():
+        row = get_db().execute(
+            "SELECT password_hash FROM user WHERE username = ?", ("tester1",)).fetchone()
+    assert row["password_hash"] != "1234"
+    assert row["password_hash"].startswith(app.config["PASSWORD_HASH_METHOD"] + "$")
+    assert check_password_hash(row["password_hash"], "1234")
+
+
+def test_users_exist(app, register_users):
+    _, _ = register_users
+    with app.app_context():
+        repo = UserRepository(get_db())
+        assert repo.users_exist(["tester1", "tester2", "nobody"]) == {"tester1", "tester2"}
+        assert repo.users_exist(["nobody", "o'neil"]) == set()
+
+
+@pytest.mark.parametrize("user_data, error", [
+    ({"username": "", "password": "1234"}, "A user must have a username."),
+    ({"username": "t", "password": "1234"}, "Username must be at least 2 characters long."),
+    ({"username": "tester1", "password": ""}, "A user must have a password."),
+    ({"username": "tester1", "password": "1"}, "The password must be at least 2 characters long."),
+    ({"username": 1234, "password": "1234"}, "Username must be a string."),
+    ({"username": ["ab", "cd"], "password": "1234"}, "Username must be a string."),
+    ({"username": "tester1", "password": 1234}, "Password must be a string."),
+])
+def test_register_invalid_user(client, user_data, error):
+    response = client.post('/register', json=user_data)
+
+    assert response.status_code == 400
+    assert response.get_json()["error"] == error
+
+
+def test_register_missing_field(client):
+    response = client.post('/register', json={"username": "tester1"})
+
+    assert response.status_code == 400
+    assert "Missing required field: 'password'" in response.get_json()["error"]
+
+
+def test_register_with_json_array_body(client):
+    response = client.post('/register', json=["x"])
+
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "Expected a JSON object."